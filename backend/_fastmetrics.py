@@ -0,0 +1,61 @@
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def rolling_std(values, window):
+    """Rolling sample standard deviation (ddof=1), NaN-padded like pandas"""
+    n = values.size
+    out = np.full(n, np.nan)
+
+    for end in range(window - 1, n):
+        start = end - window + 1
+
+        mean = 0.0
+        for i in range(start, end + 1):
+            mean += values[i]
+        mean /= window
+
+        sq_sum = 0.0
+        for i in range(start, end + 1):
+            diff = values[i] - mean
+            sq_sum += diff * diff
+
+        out[end] = np.sqrt(sq_sum / (window - 1))
+
+    return out
+
+@njit(cache=True)
+def rsi(close, window=14):
+    """Wilder's RSI: EWMA (alpha = 1/window) of close-to-close gains and losses"""
+    n = close.size
+    out = np.full(n, np.nan)
+    if n <= window:
+        return out
+
+    # Seed the averages with the simple mean of the first `window` moves
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, window + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        elif delta < 0:
+            avg_loss -= delta
+    avg_gain /= window
+    avg_loss /= window
+
+    for i in range(window, n):
+        if i > window:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (window - 1) + gain) / window
+            avg_loss = (avg_loss * (window - 1) + loss) / window
+
+        if avg_loss == 0:
+            # No losses so far: RSI saturates, or is undefined on a flat series
+            out[i] = 100.0 if avg_gain > 0 else np.nan
+        else:
+            out[i] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    return out
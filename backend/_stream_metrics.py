@@ -0,0 +1,123 @@
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Window sizes, matching calculate_metrics
+MA_WINDOW = 7
+YEAR_WINDOW = 252
+VOLATILITY_WINDOW = 20
+RSI_WINDOW = 14
+
+@dataclass
+class StreamState:
+    """Incremental metric state for one symbol.
+
+    Each update() is O(1) (amortized for the 52-week deques) and yields the
+    same values calculate_metrics would produce for the latest row, so new
+    bars can be appended without recomputing the whole history.
+    """
+    count: int = 0
+    last_date: Optional[object] = None
+    prev_close: Optional[float] = None
+
+    # Last MA_WINDOW closes for the moving average
+    closes: deque = field(default_factory=lambda: deque(maxlen=MA_WINDOW))
+
+    # Monotonic deques of (index, value): highs decreasing, lows increasing
+    highs: deque = field(default_factory=deque)
+    lows: deque = field(default_factory=deque)
+
+    # Sliding-window Welford accumulators over the last VOLATILITY_WINDOW returns
+    returns: deque = field(default_factory=deque)
+    return_mean: float = 0.0
+    return_m2: float = 0.0
+
+    # Wilder RSI: average gain/loss and number of close-to-close moves seen
+    moves: int = 0
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+
+    def update(self, day, open_, high, low, close):
+        """Fold in one daily bar and return its metrics keyed by stock_data column"""
+        if open_ is None or open_ <= 0:
+            # Bad stored row (e.g. a zero open from yfinance): no return for it,
+            # and it stays out of the volatility window instead of poisoning it
+            daily_return = None
+        else:
+            daily_return = (close - open_) / open_
+
+        index = self.count
+        self.count += 1
+        self.last_date = day
+
+        self.closes.append(close)
+        moving_avg_7 = sum(self.closes) / MA_WINDOW if len(self.closes) == MA_WINDOW else None
+
+        week52_high = self._push_extreme(self.highs, index, high, lambda old, new: old <= new)
+        week52_low = self._push_extreme(self.lows, index, low, lambda old, new: old >= new)
+
+        if daily_return is not None:
+            self._push_return(daily_return)
+        volatility = self._volatility()
+        rsi = self._push_close(close)
+
+        return {
+            "daily_return": daily_return,
+            "moving_avg_7": moving_avg_7,
+            "week52_high": week52_high,
+            "week52_low": week52_low,
+            "volatility_score": volatility * 100 if volatility is not None else None,
+            "rsi": rsi
+        }
+
+    def _push_extreme(self, window, index, value, dominated):
+        # Drop values that can never be the extreme again, then expired ones
+        while window and dominated(window[-1][1], value):
+            window.pop()
+        window.append((index, value))
+        while window[0][0] <= index - YEAR_WINDOW:
+            window.popleft()
+        return window[0][1] if self.count >= YEAR_WINDOW else None
+
+    def _push_return(self, value):
+        self.returns.append(value)
+        if len(self.returns) > VOLATILITY_WINDOW:
+            # Replace the oldest sample in one step, keeping the window size fixed
+            old = self.returns.popleft()
+            new_mean = self.return_mean + (value - old) / VOLATILITY_WINDOW
+            self.return_m2 += (value - old) * (value - new_mean + old - self.return_mean)
+            self.return_mean = new_mean
+        else:
+            delta = value - self.return_mean
+            self.return_mean += delta / len(self.returns)
+            self.return_m2 += delta * (value - self.return_mean)
+
+    def _volatility(self):
+        if len(self.returns) < VOLATILITY_WINDOW:
+            return None
+        return math.sqrt(max(self.return_m2, 0.0) / (VOLATILITY_WINDOW - 1))
+
+    def _push_close(self, close):
+        prev_close, self.prev_close = self.prev_close, close
+        if prev_close is None:
+            return None
+
+        delta = close - prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.moves += 1
+
+        if self.moves <= RSI_WINDOW:
+            # Simple mean of the first RSI_WINDOW moves seeds the averages
+            self.avg_gain += gain / RSI_WINDOW
+            self.avg_loss += loss / RSI_WINDOW
+            if self.moves < RSI_WINDOW:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (RSI_WINDOW - 1) + gain) / RSI_WINDOW
+            self.avg_loss = (self.avg_loss * (RSI_WINDOW - 1) + loss) / RSI_WINDOW
+
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else None
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
@@ -1,20 +1,41 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, insert, text, func, desc, and_, true
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import cachetools
+from datetime import datetime, date, timedelta
+import asyncio
+import orjson
+from functools import lru_cache
+from contextlib import asynccontextmanager, suppress
 from typing import List, Optional
+import heapq
+from itertools import groupby
+from operator import itemgetter
 
-from backend.database import get_db, Company, StockData
+from backend.database import get_db, AsyncSessionLocal, Company, StockData
+from backend.cache import cache, cache_put, cache_generation, invalidate, ALL_SYMBOLS
 from backend.data_collector import fetch_stock_data, calculate_metrics
+from backend._stream_metrics import StreamState, YEAR_WINDOW
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the gainers/losers/sectors snapshot warm in the background
+    refresher = asyncio.create_task(_refresh_snapshot_forever())
+    yield
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
 
 app = FastAPI(
     title="Stock Data Intelligence Dashboard API",
     description="A mini financial data platform for stock analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend
@@ -26,8 +47,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cache for frequent requests
-cache = cachetools.TTLCache(maxsize=100, ttl=300)
+def _json_default(obj):
+    # pandas Timestamps from the yfinance fallback
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson (native dates, NaN as null)"""
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default)
+
+# Columns returned by /data/{symbol}, selected as plain rows (no ORM objects)
+DATA_COLUMNS = (
+    StockData.date,
+    StockData.open,
+    StockData.high,
+    StockData.low,
+    StockData.close,
+    StockData.volume,
+    StockData.daily_return,
+    StockData.moving_avg_7,
+    StockData.week52_high,
+    StockData.week52_low,
+    StockData.volatility_score
+)
+DATA_FIELDS = tuple(column.key for column in DATA_COLUMNS)
+
+@lru_cache(maxsize=256)
+def _fetch_for_day(symbol, period, day):
+    """yfinance fetch memoized per calendar day; failures raise so they are not cached"""
+    df = fetch_stock_data(symbol, period=period)
+    if df is None:
+        raise LookupError(symbol)
+    return df
+
+async def _fetch_async(symbol, period):
+    """Fetch from yfinance in a worker thread so the event loop stays free"""
+    try:
+        return await asyncio.to_thread(_fetch_for_day, symbol, period, date.today())
+    except LookupError:
+        return None
+
+COMPANIES_SQL = text("SELECT symbol, name, sector FROM companies")
+
+# Incremental metric state per symbol for /ingest, warmed from the DB on first use
+_stream_states = {}
+_ingest_lock = asyncio.Lock()
+
+class Bar(BaseModel):
+    date: date
+    open: float = Field(gt=0, allow_inf_nan=False)
+    high: float = Field(gt=0, allow_inf_nan=False)
+    low: float = Field(gt=0, allow_inf_nan=False)
+    close: float = Field(gt=0, allow_inf_nan=False)
+    volume: int = Field(ge=0)
+
+# Cache key for the shared gainers/losers/sectors snapshot
+SNAPSHOT_KEY = "__snapshot__"
+# Seconds between background snapshot rebuilds
+SNAPSHOT_REFRESH_SECONDS = 60
+# Serializes snapshot rebuilds between the refresher and request-time misses
+_snapshot_lock = asyncio.Lock()
 
 @app.get("/")
 async def root():
@@ -40,117 +123,122 @@ async def root():
             "/compare": "GET - Compare two stocks",
             "/top-gainers": "GET - Get top gainers",
             "/top-losers": "GET - Get top losers",
-            "/sectors": "GET - Get all sectors"
+            "/sectors": "GET - Get all sectors",
+            "/ingest/{symbol}": "POST - Append one daily bar"
         }
     }
 
 @app.get("/companies", response_model=List[dict])
-async def get_companies(db: Session = Depends(get_db)):
+async def get_companies(db: AsyncSession = Depends(get_db)):
     """Get all available companies"""
     cache_key = "all_companies"
     if cache_key in cache:
         return cache[cache_key]
     
-    companies = db.query(Company).all()
-    result = [
-        {
-            "symbol": c.symbol,
-            "name": c.name,
-            "sector": c.sector
-        }
-        for c in companies
-    ]
+    rows = (await db.execute(COMPANIES_SQL)).all()
+    result = [{"symbol": r[0], "name": r[1], "sector": r[2]} for r in rows]
     
-    cache[cache_key] = result
+    cache_put(cache_key, result, [ALL_SYMBOLS])
     return result
 
-@app.get("/data/{symbol}")
+@app.get("/data/{symbol}", response_class=ORJSONResponse)
 async def get_stock_data(
     symbol: str,
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get stock data for specific symbol"""
     cache_key = f"data_{symbol}_{days}"
     if cache_key in cache:
-        return cache[cache_key]
+        return ORJSONResponse(cache[cache_key])
     
     # Fetch from database
     cutoff_date = datetime.now().date() - timedelta(days=days)
     
-    records = db.query(StockData).filter(
-        StockData.symbol == symbol,
-        StockData.date >= cutoff_date
-    ).order_by(StockData.date).all()
+    rows = (await db.execute(
+        select(*DATA_COLUMNS).where(
+            StockData.symbol == symbol,
+            StockData.date >= cutoff_date
+        ).order_by(StockData.date)
+    )).all()
     
-    if not records:
+    if not rows:
         # If no data in DB, fetch from API
-        df = fetch_stock_data(symbol, period=f"{min(days, 30)}d")
+        df = await _fetch_async(symbol, f"{min(days, 30)}d")
         if df is None:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
         result = df.to_dict(orient="records")
     else:
-        result = [
-            {
-                "date": r.date.isoformat(),
-                "open": r.open,
-                "high": r.high,
-                "low": r.low,
-                "close": r.close,
-                "volume": r.volume,
-                "daily_return": r.daily_return,
-                "moving_avg_7": r.moving_avg_7,
-                "week52_high": r.week52_high,
-                "week52_low": r.week52_low,
-                "volatility_score": r.volatility_score
-            }
-            for r in records
-        ]
+        result = [dict(zip(DATA_FIELDS, row)) for row in rows]
     
-    cache[cache_key] = result
-    return result
+    cache_put(cache_key, result, [symbol])
+    return ORJSONResponse(result)
 
 @app.get("/summary/{symbol}")
-async def get_stock_summary(symbol: str, db: Session = Depends(get_db)):
+async def get_stock_summary(symbol: str, db: AsyncSession = Depends(get_db)):
     """Get 52-week high/low and average close"""
     cache_key = f"summary_{symbol}"
     if cache_key in cache:
         return cache[cache_key]
     
-    # Get latest data
-    latest = db.query(StockData).filter(
-        StockData.symbol == symbol
-    ).order_by(desc(StockData.date)).first()
-    
-    if not latest:
-        raise HTTPException(status_code=404, detail="Symbol not found")
-    
-    # Calculate 52-week stats
     year_ago = datetime.now().date() - timedelta(days=365)
     
-    stats = db.query(
+    # Latest row and 52-week stats in a single round-trip
+    latest = select(
+        StockData.close,
+        StockData.volatility_score,
+        StockData.daily_return
+    ).where(
+        StockData.symbol == symbol
+    ).order_by(desc(StockData.date)).limit(1).subquery()
+    
+    stats = select(
         func.max(StockData.high).label('week52_high'),
         func.min(StockData.low).label('week52_low'),
         func.avg(StockData.close).label('avg_close')
-    ).filter(
+    ).where(
         StockData.symbol == symbol,
         StockData.date >= year_ago
-    ).first()
+    ).subquery()
+    
+    row = (await db.execute(
+        select(latest, stats).select_from(latest.join(stats, true()))
+    )).first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Symbol not found")
     
     result = {
         "symbol": symbol,
-        "current_price": latest.close,
-        "week52_high": float(stats.week52_high) if stats.week52_high else 0,
-        "week52_low": float(stats.week52_low) if stats.week52_low else 0,
-        "average_close": float(stats.avg_close) if stats.avg_close else 0,
-        "volatility": latest.volatility_score,
-        "daily_return": latest.daily_return
+        "current_price": row.close,
+        "week52_high": float(row.week52_high) if row.week52_high else 0,
+        "week52_low": float(row.week52_low) if row.week52_low else 0,
+        "average_close": float(row.avg_close) if row.avg_close else 0,
+        "volatility": row.volatility_score,
+        "daily_return": row.daily_return
     }
     
-    cache[cache_key] = result
+    cache_put(cache_key, result, [symbol])
     return result
 
+def _compare_series(close1, close2, returns1, returns2):
+    """Correlation, performance, volatility and last close for two price series"""
+    # Correlate over the overlapping tail when the histories differ in length
+    n = min(close1.size, close2.size)
+    c1, c2 = close1[-n:], close2[-n:]
+    correlation = ((c1 - c1.mean()) * (c2 - c2.mean())).sum() / (n * c1.std() * c2.std())
+    
+    # Performance over the period
+    perf1 = (close1[-1] - close1[0]) / close1[0] * 100
+    perf2 = (close2[-1] - close2[0]) / close2[0] * 100
+    
+    # Volatility of daily returns
+    vol1 = np.std(returns1, ddof=1) * 100
+    vol2 = np.std(returns2, ddof=1) * 100
+    
+    return correlation, perf1, perf2, vol1, vol2, close1[-1], close2[-1]
+
 @app.get("/compare")
 async def compare_stocks(
     symbol1: str = Query(..., description="First stock symbol"),
@@ -162,23 +250,20 @@ async def compare_stocks(
     if cache_key in cache:
         return cache[cache_key]
     
-    # Fetch data for both stocks
-    data1 = fetch_stock_data(symbol1, period=f"{min(days, 90)}d")
-    data2 = fetch_stock_data(symbol2, period=f"{min(days, 90)}d")
+    # Fetch data for both stocks concurrently (yfinance blocks on network I/O)
+    period = f"{min(days, 90)}d"
+    data1, data2 = await asyncio.gather(
+        _fetch_async(symbol1, period),
+        _fetch_async(symbol2, period)
+    )
     
     if data1 is None or data2 is None:
         raise HTTPException(status_code=404, detail="One or both symbols not found")
     
-    # Calculate correlation
-    correlation = np.corrcoef(data1['Close'].values, data2['Close'].values)[0, 1]
-    
-    # Calculate performance metrics
-    perf1 = (data1['Close'].iloc[-1] - data1['Close'].iloc[0]) / data1['Close'].iloc[0] * 100
-    perf2 = (data2['Close'].iloc[-1] - data2['Close'].iloc[0]) / data2['Close'].iloc[0] * 100
-    
-    # Calculate volatility
-    vol1 = data1['Daily_Return'].std() * 100
-    vol2 = data2['Daily_Return'].std() * 100
+    correlation, perf1, perf2, vol1, vol2, last1, last2 = _compare_series(
+        data1['Close'].to_numpy(dtype=float), data2['Close'].to_numpy(dtype=float),
+        data1['Daily_Return'].to_numpy(dtype=float), data2['Daily_Return'].to_numpy(dtype=float)
+    )
     
     result = {
         "stocks": [symbol1, symbol2],
@@ -193,110 +278,207 @@ async def compare_stocks(
             symbol2: float(vol2)
         },
         "current_prices": {
-            symbol1: float(data1['Close'].iloc[-1]),
-            symbol2: float(data2['Close'].iloc[-1])
+            symbol1: float(last1),
+            symbol2: float(last2)
         }
     }
     
-    cache[cache_key] = result
+    cache_put(cache_key, result, [symbol1, symbol2])
     return result
 
-@app.get("/top-gainers")
-async def get_top_gainers(db: Session = Depends(get_db)):
-    """Get top 5 gaining stocks"""
-    cache_key = "top_gainers"
-    if cache_key in cache:
-        return cache[cache_key]
+async def _compute_snapshot(db: AsyncSession):
+    """Latest vs previous close for every company, keyed by symbol"""
+    ranked = select(
+        StockData.symbol,
+        StockData.close,
+        StockData.volume,
+        func.row_number().over(
+            partition_by=StockData.symbol,
+            order_by=desc(StockData.date)
+        ).label('rn')
+    ).subquery()
     
-    # Get latest prices for all companies
-    companies = db.query(Company).all()
-    gainers = []
+    # Outer join keeps companies without data so their sector still shows up
+    rows = (await db.execute(
+        select(
+            Company.symbol, Company.name, Company.sector,
+            ranked.c.close, ranked.c.volume, ranked.c.rn
+        ).outerjoin(
+            ranked, and_(ranked.c.symbol == Company.symbol, ranked.c.rn <= 2)
+        ).order_by(Company.symbol, ranked.c.rn)
+    )).all()
     
-    for company in companies:
-        # Get last 2 days of data
-        data = db.query(StockData).filter(
-            StockData.symbol == company.symbol
-        ).order_by(desc(StockData.date)).limit(2).all()
-        
-        if len(data) >= 2:
-            change = ((data[0].close - data[1].close) / data[1].close) * 100
-            gainers.append({
-                "symbol": company.symbol,
-                "name": company.name,
-                "current_price": data[0].close,
-                "change_percent": float(change),
-                "volume": data[0].volume
-            })
-    
-    # Sort by gain
-    gainers.sort(key=lambda x: x["change_percent"], reverse=True)
-    
-    result = gainers[:5]
-    cache[cache_key] = result
-    return result
+    # Group the two most recent rows per symbol
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.symbol, []).append(row)
+    
+    snapshot = {}
+    for symbol, pair in latest.items():
+        change = None
+        if len(pair) >= 2:
+            change = float(((pair[0].close - pair[1].close) / pair[1].close) * 100)
+        snapshot[symbol] = {
+            "symbol": symbol,
+            "name": pair[0].name,
+            "sector": pair[0].sector,
+            "close": pair[0].close,
+            "volume": pair[0].volume,
+            "change": change
+        }
+    
+    return snapshot
 
-@app.get("/top-losers")
-async def get_top_losers(db: Session = Depends(get_db)):
-    """Get top 5 losing stocks"""
-    cache_key = "top_losers"
-    if cache_key in cache:
-        return cache[cache_key]
+async def _recompute_snapshot(db: AsyncSession):
+    """Rebuild the snapshot and swap it into the cache in one assignment"""
+    generation = cache_generation()
+    snapshot = await _compute_snapshot(db)
+    # An ingest may have committed and invalidated while the query ran; the
+    # result may predate that write, so leave the slot empty rather than pin it
+    if cache_generation() == generation:
+        # Pinned: the refresher keeps it current, writes still invalidate it
+        cache_put(SNAPSHOT_KEY, snapshot, [ALL_SYMBOLS], pin=True)
+    return snapshot
+
+async def _snapshot(db: AsyncSession):
+    """Shared snapshot for gainers, losers and sectors.
+
+    Normally served from the cache kept warm by the background refresher;
+    rebuilt on demand after an invalidation.
+    """
+    if SNAPSHOT_KEY in cache:
+        return cache[SNAPSHOT_KEY]
     
-    # Get latest prices for all companies
-    companies = db.query(Company).all()
-    losers = []
+    async with _snapshot_lock:
+        # Another request may have rebuilt it while we waited
+        if SNAPSHOT_KEY in cache:
+            return cache[SNAPSHOT_KEY]
+        return await _recompute_snapshot(db)
+
+async def _refresh_snapshot_forever():
+    """Background task: rebuild the snapshot every SNAPSHOT_REFRESH_SECONDS"""
+    while True:
+        try:
+            async with _snapshot_lock:
+                async with AsyncSessionLocal() as db:
+                    await _recompute_snapshot(db)
+        except Exception as e:
+            print(f"Error refreshing snapshot: {e}")
+        await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
+
+def _top_movers(snapshot, reverse):
+    """Top 5 entries of the snapshot ordered by daily change"""
+    movers = (s for s in snapshot.values() if s["change"] is not None)
+    # O(N log 5) partial selection instead of a full sort
+    select_top = heapq.nlargest if reverse else heapq.nsmallest
     
-    for company in companies:
-        # Get last 2 days of data
-        data = db.query(StockData).filter(
-            StockData.symbol == company.symbol
-        ).order_by(desc(StockData.date)).limit(2).all()
-        
-        if len(data) >= 2:
-            change = ((data[0].close - data[1].close) / data[1].close) * 100
-            losers.append({
-                "symbol": company.symbol,
-                "name": company.name,
-                "current_price": data[0].close,
-                "change_percent": float(change),
-                "volume": data[0].volume
-            })
-    
-    # Sort by loss
-    losers.sort(key=lambda x: x["change_percent"])
-    
-    result = losers[:5]
-    cache[cache_key] = result
-    return result
+    return [
+        {
+            "symbol": s["symbol"],
+            "name": s["name"],
+            "current_price": s["close"],
+            "change_percent": s["change"],
+            "volume": s["volume"]
+        }
+        for s in select_top(5, movers, key=itemgetter("change"))
+    ]
+
+@app.get("/top-gainers")
+async def get_top_gainers(db: AsyncSession = Depends(get_db)):
+    """Get top 5 gaining stocks"""
+    return _top_movers(await _snapshot(db), reverse=True)
+
+@app.get("/top-losers")
+async def get_top_losers(db: AsyncSession = Depends(get_db)):
+    """Get top 5 losing stocks"""
+    return _top_movers(await _snapshot(db), reverse=False)
+
+def _sector_key(entry):
+    # Sector is nullable: order None after named sectors and keep it distinct from ""
+    sector = entry["sector"]
+    return (sector is None, sector or "")
 
 @app.get("/sectors")
-async def get_sectors(db: Session = Depends(get_db)):
+async def get_sectors(db: AsyncSession = Depends(get_db)):
     """Get all sectors with average performance"""
+    snapshot = await _snapshot(db)
+    entries = sorted(snapshot.values(), key=_sector_key)
+    
     sectors = {}
+    for _, group in groupby(entries, key=_sector_key):
+        group = list(group)
+        sector = group[0]["sector"]
+        companies = [
+            {"symbol": e["symbol"], "name": e["name"], "change": e["change"]}
+            for e in group if e["change"] is not None
+        ]
+        avg_change = 0
+        if companies:
+            avg_change = float(sum(c["change"] for c in companies) / len(companies))
+        sectors[sector] = {"companies": companies, "avg_change": avg_change}
     
-    companies = db.query(Company).all()
+    return sectors
+
+async def _warm_stream_state(db: AsyncSession, symbol: str):
+    """Replay the stored history once so later bars update in O(1).
+
+    YEAR_WINDOW rows cover every window; the RSI average forgets older
+    moves by a factor of (13/14)^252, so earlier rows are not needed.
+    """
+    rows = (await db.execute(
+        select(
+            StockData.date, StockData.open, StockData.high, StockData.low, StockData.close
+        ).where(
+            StockData.symbol == symbol
+        ).order_by(desc(StockData.date)).limit(YEAR_WINDOW)
+    )).all()
     
-    for company in companies:
-        if company.sector not in sectors:
-            sectors[company.sector] = {"companies": [], "avg_change": 0}
+    state = StreamState()
+    for row in reversed(rows):
+        state.update(row.date, row.open, row.high, row.low, row.close)
+    
+    _stream_states[symbol] = state
+    return state
+
+@app.post("/ingest/{symbol}")
+async def ingest_bar(symbol: str, bar: Bar, db: AsyncSession = Depends(get_db)):
+    """Append one daily bar, computing its metrics incrementally"""
+    async with _ingest_lock:
+        exists = (await db.execute(
+            select(Company.symbol).where(Company.symbol == symbol)
+        )).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Symbol not found")
+        
+        # The collector or another worker may have written rows since this
+        # state was built, so rebuild it whenever the stored history moved on
+        latest_date = (await db.execute(
+            select(func.max(StockData.date)).where(StockData.symbol == symbol)
+        )).scalar()
         
-        # Get last 2 days of data
-        data = db.query(StockData).filter(
-            StockData.symbol == company.symbol
-        ).order_by(desc(StockData.date)).limit(2).all()
+        state = _stream_states.get(symbol)
+        if state is None or state.last_date != latest_date:
+            state = await _warm_stream_state(db, symbol)
         
-        if len(data) >= 2:
-            change = ((data[0].close - data[1].close) / data[1].close) * 100
-            sectors[company.sector]["companies"].append({
-                "symbol": company.symbol,
-                "name": company.name,
-                "change": float(change)
-            })
-    
-    # Calculate average change per sector
-    for sector, data in sectors.items():
-        if data["companies"]:
-            avg_change = sum(c["change"] for c in data["companies"]) / len(data["companies"])
-            sectors[sector]["avg_change"] = float(avg_change)
-    
-    return sectors
\ No newline at end of file
+        if latest_date is not None and bar.date <= latest_date:
+            raise HTTPException(status_code=409, detail="Bar is not newer than the latest stored date")
+        
+        try:
+            metrics = state.update(bar.date, bar.open, bar.high, bar.low, bar.close)
+            rsi = metrics.pop("rsi")
+            row = {"symbol": symbol, **bar.model_dump(), **metrics}
+            
+            await db.execute(insert(StockData).values(row))
+            await db.commit()
+        except IntegrityError:
+            # Another writer stored this date first; the state advanced past the DB
+            _stream_states.pop(symbol, None)
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Bar is not newer than the latest stored date")
+        except Exception:
+            # Rebuild the state from the DB on the next ingest
+            _stream_states.pop(symbol, None)
+            raise
+    
+    invalidate([symbol])
+    return ORJSONResponse({**row, "rsi": rsi})
@@ -0,0 +1,75 @@
+import math
+import cachetools
+
+# Fallback lifetime (seconds) for entries that are not pinned
+FALLBACK_TTL = 60
+
+# Keys that never expire and are only dropped by invalidate()
+_pinned_keys = set()
+
+def _ttu(key, value, now):
+    return math.inf if key in _pinned_keys else now + FALLBACK_TTL
+
+# Response cache shared by the API routes. Writes made through the API
+# evict dependent entries via invalidate(); the short TTL is what picks up
+# writes made by another process (e.g. the data collector script).
+cache = cachetools.TLRUCache(maxsize=1000, ttu=_ttu)
+
+# Tag for entries that depend on every symbol (market-wide views)
+ALL_SYMBOLS = "*"
+
+# symbol -> cache keys that must be dropped when that symbol changes
+_keys_by_symbol = {}
+# Total (symbol, key) pairs in _keys_by_symbol, including evicted keys
+_tag_count = 0
+
+# Bumped by every invalidate(), so a slow recompute can tell that a write
+# landed while it was reading and its result may already be stale
+_generation = 0
+
+def _prune_tags():
+    """Forget keys the cache has already evicted or expired"""
+    global _tag_count
+    for symbol in list(_keys_by_symbol):
+        live = {key for key in _keys_by_symbol[symbol] if key in cache}
+        if live:
+            _keys_by_symbol[symbol] = live
+        else:
+            del _keys_by_symbol[symbol]
+    _pinned_keys.intersection_update(cache.keys())
+    _tag_count = sum(len(keys) for keys in _keys_by_symbol.values())
+
+def cache_put(key, value, symbols, pin=False):
+    """Store value under key and register it against the symbols it depends on.
+
+    Pinned entries skip the fallback TTL and live until invalidated.
+    """
+    global _tag_count
+    if pin:
+        _pinned_keys.add(key)
+    cache[key] = value
+    for symbol in symbols:
+        keys = _keys_by_symbol.setdefault(symbol, set())
+        if key not in keys:
+            keys.add(key)
+            _tag_count += 1
+    
+    # Evictions don't report back here, so sweep stale tags once the index
+    # outgrows what the cache could possibly hold (amortized O(1) per put)
+    if _tag_count > 4 * cache.maxsize:
+        _prune_tags()
+
+def cache_generation():
+    """Current invalidation generation, to compare before and after a recompute"""
+    return _generation
+
+def invalidate(symbols):
+    """Evict every cached entry that depends on any of the given symbols"""
+    global _tag_count, _generation
+    _generation += 1
+    for symbol in (*symbols, ALL_SYMBOLS):
+        keys = _keys_by_symbol.pop(symbol, set())
+        _tag_count -= len(keys)
+        for key in keys:
+            cache.pop(key, None)
+            _pinned_keys.discard(key)
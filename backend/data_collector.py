@@ -1,40 +1,70 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from database import SessionLocal, Company, StockData
+from _fastmetrics import rsi, rolling_std
+
+# DataFrame column -> stock_data column for rows stored by the collector
+STOCK_DATA_COLUMNS = {
+    'Date': 'date',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume',
+    'Daily_Return': 'daily_return',
+    'MA_7': 'moving_avg_7',
+    '52W_High': 'week52_high',
+    '52W_Low': 'week52_low',
+    'Volatility_Score': 'volatility_score'
+}
+
+def _rolling(values, window, reducer):
+    """Apply reducer over trailing windows, NaN-padded like pandas rolling"""
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= window:
+        out[window - 1:] = reducer(sliding_window_view(values, window), axis=-1)
+    return out
 
 def calculate_metrics(df):
     """Calculate custom metrics for stock data"""
-    df = df.copy()
+    open_ = df['Open'].to_numpy(dtype=float)
+    high = df['High'].to_numpy(dtype=float)
+    low = df['Low'].to_numpy(dtype=float)
+    close = df['Close'].to_numpy(dtype=float)
     
     # Daily Return
-    df['Daily_Return'] = (df['Close'] - df['Open']) / df['Open']
-    
-    # 7-day Moving Average
-    df['MA_7'] = df['Close'].rolling(window=7).mean()
-    
-    # 52-week High/Low (252 trading days)
-    df['52W_High'] = df['High'].rolling(window=252).max()
-    df['52W_Low'] = df['Low'].rolling(window=252).min()
-    
-    # Custom Metric: Volatility Score (standard deviation of daily returns over 20 days)
-    df['Volatility_Score'] = df['Daily_Return'].rolling(window=20).std() * 100
-    
-    # Custom Metric: RSI (Relative Strength Index)
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    daily_return = (close - open_) / open_
     
-    return df
+    return df.assign(
+        Daily_Return=daily_return,
+        # 7-day Moving Average
+        MA_7=_rolling(close, 7, np.mean),
+        # 52-week High/Low (252 trading days)
+        **{
+            '52W_High': _rolling(high, 252, np.max),
+            '52W_Low': _rolling(low, 252, np.min),
+        },
+        # Custom Metric: Volatility Score (standard deviation of daily returns over 20 days)
+        Volatility_Score=rolling_std(daily_return, 20) * 100,
+        # Custom Metric: RSI (Relative Strength Index)
+        RSI=rsi(close, 14)
+    )
+
+@lru_cache(maxsize=256)
+def _ticker(symbol):
+    """Reuse one yfinance Ticker per symbol instead of rebuilding it per fetch"""
+    return yf.Ticker(symbol)
 
 def fetch_stock_data(symbol, period="1mo"):
     """Fetch stock data from yfinance"""
     try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period)
+        df = _ticker(symbol).history(period=period)
         
         if df.empty:
             return None
@@ -68,45 +98,38 @@ def initialize_sample_companies():
         {"symbol": "HINDUNILVR.NS", "name": "Hindustan Unilever", "sector": "FMCG"},
     ]
     
-    # Add companies to database
-    for company in companies:
-        exists = db.query(Company).filter(Company.symbol == company["symbol"]).first()
-        if not exists:
-            db_company = Company(
-                symbol=company["symbol"],
-                name=company["name"],
-                sector=company["sector"]
-            )
-            db.add(db_company)
+    # Add companies to database, skipping ones already present
+    db.execute(
+        sqlite_insert(Company).values(companies)
+        .on_conflict_do_nothing(index_elements=['symbol'])
+    )
     
-    db.commit()
+    # Download every company's history in parallel, then store sequentially
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        frames = list(executor.map(
+            lambda c: fetch_stock_data(c["symbol"], period="3mo"), companies
+        ))
     
-    # Fetch and store recent data for each company
-    for company in companies:
-        df = fetch_stock_data(company["symbol"], period="3mo")
+    for company, df in zip(companies, frames):
         if df is not None:
-            for _, row in df.iterrows():
-                exists = db.query(StockData).filter(
-                    StockData.symbol == company["symbol"],
-                    StockData.date == row['Date'].date()
-                ).first()
-                
-                if not exists:
-                    stock_data = StockData(
-                        symbol=company["symbol"],
-                        date=row['Date'].date(),
-                        open=row['Open'],
-                        high=row['High'],
-                        low=row['Low'],
-                        close=row['Close'],
-                        volume=int(row['Volume']),
-                        daily_return=row.get('Daily_Return'),
-                        moving_avg_7=row.get('MA_7'),
-                        week52_high=row.get('52W_High'),
-                        week52_low=row.get('52W_Low'),
-                        volatility_score=row.get('Volatility_Score')
-                    )
-                    db.add(stock_data)
+            records = (
+                df[list(STOCK_DATA_COLUMNS)]
+                .rename(columns=STOCK_DATA_COLUMNS)
+                .assign(
+                    symbol=company["symbol"],
+                    date=df['Date'].dt.date
+                )
+            )
+            # Metric warm-up rows are NaN; send them to the DB as NULL in one pass
+            rows = records.astype(object).where(pd.notna(records), None).to_dict(orient="records")
+            
+            # One executemany per company; existing (symbol, date) rows are ignored
+            db.execute(
+                sqlite_insert(StockData).on_conflict_do_nothing(
+                    index_elements=['symbol', 'date']
+                ),
+                rows
+            )
     
     db.commit()
     db.close()
@@ -1,18 +1,44 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, REAL, Date, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import datetime
 
 # SQLite database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./stocks.db"
+# Async driver used by the API (use postgresql+asyncpg:// for PostgreSQL)
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./stocks.db"
 
+# Sync engine for table creation and the data collector script
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the FastAPI routes
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL for concurrent readers, relaxed fsync and memory-mapped reads"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
+
 Base = declarative_base()
 
+# 4-byte floats are plenty for quotes and metrics. PostgreSQL stores them as
+# REAL; SQLite keeps every REAL as 8 bytes regardless, so dev is unaffected.
+Float32 = Float().with_variant(REAL(), "postgresql")
+
 class Company(Base):
     __tablename__ = "companies"
     
@@ -24,27 +50,37 @@ class Company(Base):
 
 class StockData(Base):
     __tablename__ = "stock_data"
+    __table_args__ = (
+        # A unique index rather than a table constraint so it can be added
+        # to databases created before it existed (see below)
+        Index('uq_stock_data_symbol_date', 'symbol', 'date', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True)
     date = Column(Date)
-    open = Column(Float)
-    high = Column(Float)
-    low = Column(Float)
-    close = Column(Float)
+    open = Column(Float32)
+    high = Column(Float32)
+    low = Column(Float32)
+    close = Column(Float32)
     volume = Column(Integer)
-    daily_return = Column(Float, nullable=True)
-    moving_avg_7 = Column(Float, nullable=True)
-    week52_high = Column(Float, nullable=True)
-    week52_low = Column(Float, nullable=True)
-    volatility_score = Column(Float, nullable=True)
+    daily_return = Column(Float32, nullable=True)
+    moving_avg_7 = Column(Float32, nullable=True)
+    week52_high = Column(Float32, nullable=True)
+    week52_low = Column(Float32, nullable=True)
+    volatility_score = Column(Float32, nullable=True)
+
+# Composite index so per-symbol "latest rows first" lookups avoid a sort
+Index('ix_stock_data_symbol_date', StockData.symbol, StockData.date.desc())
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# create_all skips indexes on tables that already exist, so add any that
+# older stocks.db files are missing
+for _index in StockData.__table__.indexes:
+    _index.create(bind=engine, checkfirst=True)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
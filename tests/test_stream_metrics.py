@@ -0,0 +1,72 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from _stream_metrics import StreamState
+
+# StreamState column -> calculate_metrics column
+COLUMNS = {
+    "daily_return": "Daily_Return",
+    "moving_avg_7": "MA_7",
+    "week52_high": "52W_High",
+    "week52_low": "52W_Low",
+    "volatility_score": "Volatility_Score",
+    "rsi": "RSI",
+}
+
+@pytest.fixture
+def calculate_metrics(tmp_path, monkeypatch):
+    # Importing the collector creates ./stocks.db, so keep it out of the repo
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("data_collector").calculate_metrics
+
+def _history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 2500 * np.cumprod(1 + rng.normal(0, 0.015, n))
+    return pd.DataFrame({
+        "Date": pd.date_range("2023-01-02", periods=n, freq="B"),
+        "Open": close * rng.uniform(0.98, 1.02, n),
+        "High": close * rng.uniform(1.0, 1.03, n),
+        "Low": close * rng.uniform(0.97, 1.0, n),
+        "Close": close,
+        "Volume": rng.integers(1_000, 3_000_000_000, n),
+    })
+
+@pytest.mark.parametrize("n", [5, 30, 252, 400])
+def test_stream_matches_batch_metrics(calculate_metrics, n):
+    df = _history(n)
+    batch = calculate_metrics(df)
+
+    state = StreamState()
+    streamed = pd.DataFrame([
+        state.update(row.Date, row.Open, row.High, row.Low, row.Close)
+        for row in df.itertuples()
+    ]).astype(float)
+
+    for stream_col, batch_col in COLUMNS.items():
+        np.testing.assert_allclose(
+            streamed[stream_col].to_numpy(), batch[batch_col].to_numpy(dtype=float),
+            rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=stream_col
+        )
+
+def test_zero_open_row_does_not_break_warm_up():
+    df = _history(300)
+    df.loc[100, "Open"] = 0.0
+
+    state = StreamState()
+    rows = [
+        state.update(row.Date, row.Open, row.High, row.Low, row.Close)
+        for row in df.itertuples()
+    ]
+    assert rows[100]["daily_return"] is None
+
+    metrics = state.update(pd.Timestamp("2024-03-01"), 2500.0, 2550.0, 2450.0, 2520.0)
+    for value in metrics.values():
+        assert value is not None and np.isfinite(value)